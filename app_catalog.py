@@ -0,0 +1,281 @@
+# app_catalog.py
+# Index of installed applications, built by scanning launchers once and saved to
+# disk. Later refreshes only rescan sources where a directory's modification time changed.
+import difflib
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import threading
+
+CATALOG_PATH = os.path.join(os.path.expanduser("~"), ".luna", "app_catalog.json")
+
+# Spoken names that differ from the launcher name. Tried in order, and only
+# when the spoken name itself is not in the catalog.
+ALIASES = {
+    'calculator': ('calc', 'gnome calculator', 'kcalc'),
+    'paint': ('mspaint',),
+    'command prompt': ('cmd',),
+    'wordpad': ('write',),
+    'control panel': ('control',),
+    'task manager': ('taskmgr',),
+    'file explorer': ('explorer',),
+    'browser': ('google chrome', 'firefox', 'microsoft edge', 'chromium', 'safari'),
+}
+
+# Power and session commands that a spoken "open X" must never start, matched
+# against both the catalog key and the program a launcher runs
+BLOCKED_COMMANDS = {
+    'shutdown', 'shut down', 'poweroff', 'power off', 'reboot', 'restart', 'halt',
+    'systemctl', 'loginctl', 'init', 'telinit', 'logout', 'log out', 'logoff', 'sign out',
+    'tsdiscon', 'pm suspend', 'pm hibernate', 'gnome session quit', 'xfce4 session logout',
+}
+
+# PATH entries Popen can start directly on Windows; .msc/.vbs/.js need a shell host
+RUNNABLE_EXTS = ('.exe', '.com', '.bat', '.cmd')
+
+# Freedesktop field codes (%U, %f, ...) that must be dropped from Exec lines
+_FIELD_CODE = re.compile(r"\s*%[a-zA-Z]")
+
+
+def normalize_name(name):
+    """Turns a launcher or spoken name into a lookup key: 'Google-Chrome.exe' -> 'google chrome'."""
+    name = os.path.splitext(name)[0] if name.lower().endswith(('.exe', '.com', '.lnk', '.desktop', '.app', '.bat', '.cmd')) else name
+    return " ".join(re.sub(r"[_\-.]+", " ", name.lower()).split())
+
+
+def _source_dirs():
+    """Yields (directory, kind) pairs to scan on this platform."""
+    if sys.platform == 'win32':
+        for root in (os.environ.get('ProgramData'), os.environ.get('APPDATA')):
+            if root:
+                yield os.path.join(root, 'Microsoft', 'Windows', 'Start Menu', 'Programs'), 'lnk'
+    elif sys.platform == 'darwin':
+        yield '/Applications', 'app'
+        yield os.path.expanduser('~/Applications'), 'app'
+    else:
+        data_dirs = os.environ.get('XDG_DATA_DIRS', '/usr/local/share:/usr/share').split(':')
+        data_dirs.insert(0, os.environ.get('XDG_DATA_HOME', os.path.expanduser('~/.local/share')))
+        data_dirs.append('/var/lib/flatpak/exports/share')
+        for data_dir in data_dirs:
+            yield os.path.join(data_dir, 'applications'), 'desktop'
+    for path_dir in os.environ.get('PATH', '').split(os.pathsep):
+        if path_dir:
+            yield path_dir, 'exe'
+
+
+def _scan_dir(directory, kind):
+    """
+    Returns ({key: entry}, {dir: mtime}) for the launchers found under one source.
+    Nested sources record every directory they walk, since adding a shortcut to
+    Programs\\<Vendor> does not change the mtime of Programs itself.
+    """
+    apps = {}
+    mtimes = {directory: os.stat(directory).st_mtime}
+    if kind == 'exe':
+        with os.scandir(directory) as it:
+            for entry in it:
+                if sys.platform == 'win32':
+                    if os.path.splitext(entry.name)[1].lower() not in RUNNABLE_EXTS:
+                        continue
+                elif not (entry.is_file() and os.access(entry.path, os.X_OK)):
+                    continue
+                apps[normalize_name(entry.name)] = {"name": entry.name, "kind": kind, "target": [entry.path]}
+    elif kind == 'desktop':
+        for name in os.listdir(directory):
+            if name.endswith('.desktop'):
+                entry = _parse_desktop_file(os.path.join(directory, name))
+                if entry:
+                    apps[normalize_name(entry["name"])] = entry
+                    apps.setdefault(normalize_name(name), entry)
+    else:
+        # Start Menu shortcuts live in nested folders; .app bundles are directories
+        for root, dirs, files in os.walk(directory):
+            names = dirs if kind == 'app' else files
+            for name in names:
+                if name.lower().endswith('.' + kind):
+                    apps[normalize_name(name)] = {"name": os.path.splitext(name)[0], "kind": kind,
+                                                  "target": os.path.join(root, name)}
+            if kind == 'app':
+                dirs[:] = [d for d in dirs if not d.endswith('.app')]
+            for d in dirs:
+                try:
+                    mtimes[os.path.join(root, d)] = os.stat(os.path.join(root, d)).st_mtime
+                except OSError:
+                    pass
+    return apps, mtimes
+
+
+def _is_stale(cached, kind):
+    """True if any directory recorded for a source changed or disappeared since its scan."""
+    if cached is None or cached.get("kind") != kind or "mtimes" not in cached:
+        return True
+    for directory, mtime in cached["mtimes"].items():
+        try:
+            if os.stat(directory).st_mtime != mtime:
+                return True
+        except OSError:
+            return True
+    return False
+
+
+def _is_blocked(key, entry):
+    """True for power and session commands, whatever name they are listed under."""
+    target = entry["target"]
+    program = target[0] if isinstance(target, list) and target else target
+    return key in BLOCKED_COMMANDS or normalize_name(os.path.basename(program or '')) in BLOCKED_COMMANDS
+
+
+def _parse_desktop_file(path):
+    """Reads Name and Exec from a .desktop entry, skipping hidden ones."""
+    fields = {}
+    in_entry = False
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('['):
+                    in_entry = line == '[Desktop Entry]'
+                elif in_entry and '=' in line:
+                    key, value = line.split('=', 1)
+                    fields.setdefault(key.strip(), value.strip())
+    except OSError:
+        return None
+    if fields.get('NoDisplay') == 'true' or fields.get('Hidden') == 'true' or not fields.get('Exec'):
+        return None
+    try:
+        argv = shlex.split(_FIELD_CODE.sub('', fields['Exec']))
+    except ValueError:
+        return None
+    return {"name": fields.get('Name', os.path.basename(path)), "kind": "desktop", "target": argv}
+
+
+class AppCatalog:
+    """Persistent index of installed applications with fuzzy lookup by spoken name."""
+
+    def __init__(self, path=CATALOG_PATH, log=print):
+        self.path = path
+        self.log = log
+        self.dirs = {}   # source directory -> {"kind", "mtimes": {dir: mtime}, "apps": {key: entry}}
+        self.index = {}
+        self._fuzzy_keys = []
+        self._words = {}
+        self._memo = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def load(self):
+        """Loads the saved catalog; returns False if there is none yet."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.dirs = json.load(f).get("dirs", {})
+        except (OSError, ValueError):
+            return False
+        self._rebuild_index()
+        return True
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"dirs": self.dirs}, f)
+        os.replace(tmp_path, self.path)
+
+    def refresh(self):
+        """Rescans only the launcher directories that changed since the last scan."""
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self):
+        changed = False
+        seen = set()
+        for directory, kind in _source_dirs():
+            if directory in seen:
+                continue
+            seen.add(directory)
+            if not os.path.isdir(directory):
+                changed |= self.dirs.pop(directory, None) is not None
+                continue
+            if not _is_stale(self.dirs.get(directory), kind):
+                continue
+            try:
+                apps, mtimes = _scan_dir(directory, kind)
+            except OSError:
+                continue
+            self.dirs[directory] = {"kind": kind, "mtimes": mtimes, "apps": apps}
+            changed = True
+        for directory in set(self.dirs) - seen:
+            del self.dirs[directory]
+            changed = True
+        if changed:
+            self._rebuild_index()
+            try:
+                self.save()
+            except OSError as e:
+                self.log(f"Warning: Could not save application catalog. Error: {e}")
+        return changed
+
+    def refresh_in_background(self):
+        threading.Thread(target=self.refresh, daemon=True).start()
+
+    def _rebuild_index(self):
+        index = {}
+        # Desktop entries, shortcuts and bundles take priority over bare PATH executables
+        for info in sorted(self.dirs.values(), key=lambda d: d["kind"] == 'exe'):
+            for key, entry in info["apps"].items():
+                if not _is_blocked(key, entry):
+                    index.setdefault(key, entry)
+        # PATH holds every command-line tool, so those only resolve on an exact name;
+        # fuzzy matching is limited to real launchers ('files' must not start 'file')
+        fuzzy_keys = [key for key, entry in index.items() if entry["kind"] != 'exe']
+        words = {}
+        for key in fuzzy_keys:
+            for word in key.split():
+                words.setdefault(word, []).append(key)
+        with self._lock:
+            self.index = index
+            self._fuzzy_keys = fuzzy_keys
+            self._words = words
+            self._memo = {}
+
+    def lookup(self, spoken_name):
+        """Resolves a spoken application name to a catalog entry, or None."""
+        key = normalize_name(spoken_name or '')
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+            index, words, fuzzy_keys = self.index, self._words, self._fuzzy_keys
+        # The spoken name first, then its aliases: exact matches before fuzzy ones
+        keys = (key,) + ALIASES.get(key, ())
+        entry = next((index[k] for k in keys if k in index), None)
+        for k in keys:
+            if entry is not None:
+                break
+            entry = self._closest(k, index, words, fuzzy_keys)
+        with self._lock:
+            self._memo[key] = entry
+        return entry
+
+    @staticmethod
+    def _closest(key, index, words, fuzzy_keys):
+        # Every spoken word appears in the name: 'chrome' -> 'google chrome'
+        candidates = None
+        for word in key.split():
+            matches = set(words.get(word, ()))
+            candidates = matches if candidates is None else candidates & matches
+        if candidates:
+            return index[min(candidates, key=len)]
+        close = difflib.get_close_matches(key, fuzzy_keys, n=1, cutoff=0.8)
+        return index[close[0]] if close else None
+
+
+def launch(entry):
+    """Starts a catalog entry directly, without going through a shell."""
+    if entry["kind"] == 'lnk':
+        os.startfile(entry["target"])
+    elif entry["kind"] == 'app':
+        subprocess.Popen(['open', entry["target"]])
+    else:
+        subprocess.Popen(entry["target"])
@@ -0,0 +1,107 @@
+# conversation_store.py
+# Append-only SQLite log of chat turns. Startup only reads the newest turns of
+# the current session through an index, so resume time does not grow with history.
+import os
+import sqlite3
+import threading
+import time
+
+STORE_PATH = os.path.join(os.path.expanduser("~"), ".luna", "conversations.db")
+RESUME_TURNS = 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    ts REAL NOT NULL,
+    role TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS turns_by_session ON turns(session_id, id);
+"""
+
+# Full-text index over turns, kept in sync by triggers. Skipped if this SQLite
+# build lacks FTS5, in which case search falls back to LIKE.
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5(text, content='turns', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS turns_fts_insert AFTER INSERT ON turns BEGIN
+    INSERT INTO turns_fts(rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+
+class ConversationStore:
+    """Persists chat turns across restarts and resumes the latest session."""
+
+    def __init__(self, path=STORE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+            fts_existed = self._db.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'turns_fts'").fetchone() is not None
+            try:
+                self._db.executescript(_FTS_SCHEMA)
+                self.has_fts = True
+            except sqlite3.OperationalError:
+                self.has_fts = False
+            if self.has_fts and not fts_existed:
+                # Index turns written before full-text search was available
+                self._db.execute("INSERT INTO turns_fts(turns_fts) VALUES ('rebuild')")
+        row = self._db.execute("SELECT MAX(id) FROM sessions").fetchone()
+        self.session_id = row[0] if row[0] is not None else self.start_session()
+
+    def start_session(self):
+        """Starts a new conversation; earlier ones stay searchable but are not resumed."""
+        with self._lock, self._db:
+            cursor = self._db.execute("INSERT INTO sessions(started_at) VALUES (?)", (time.time(),))
+        self.session_id = cursor.lastrowid
+        return self.session_id
+
+    def append(self, role, text):
+        """Records one turn ('user' or 'model') in the current session."""
+        if not text:
+            return
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO turns(session_id, ts, role, text) VALUES (?, ?, ?, ?)",
+                             (self.session_id, time.time(), role, text))
+
+    def recent_history(self, limit=RESUME_TURNS):
+        """Returns the newest turns of the current session in Gemini history format."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT role, text FROM turns WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                (self.session_id, limit)).fetchall()
+        rows.reverse()
+        # History has to open with a user turn
+        while rows and rows[0][0] != "user":
+            rows.pop(0)
+        return [{"role": role, "parts": [text]} for role, text in rows]
+
+    def search(self, query, limit=5):
+        """Finds past turns across all sessions, newest first, as (timestamp, role, text)."""
+        with self._lock:
+            if self.has_fts:
+                terms = " ".join('"' + word.replace('"', '') + '"' for word in query.split())
+                try:
+                    return self._db.execute(
+                        "SELECT turns.ts, turns.role, turns.text FROM turns_fts "
+                        "JOIN turns ON turns.id = turns_fts.rowid "
+                        "WHERE turns_fts MATCH ? ORDER BY turns.id DESC LIMIT ?",
+                        (terms, limit)).fetchall()
+                except sqlite3.OperationalError:
+                    pass
+            return self._db.execute(
+                "SELECT ts, role, text FROM turns WHERE text LIKE ? ORDER BY id DESC LIMIT ?",
+                (f"%{query}%", limit)).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
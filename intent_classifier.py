@@ -0,0 +1,329 @@
+# intent_classifier.py
+# Routes plain tool requests ("how hot is it in pune") straight to the matching
+# tool using TF-IDF similarity over word and character n-grams, so only commands
+# the classifier is unsure about go to Gemini.
+import json
+import os
+import re
+import time
+from collections import deque
+
+import numpy as np
+
+CONFIDENCE_THRESHOLD = 0.5
+TOOLS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools.json")
+
+# Example utterances per tool. Commands labelled None are general chat and must
+# stay with Gemini; they give the classifier something to match them against.
+EXAMPLE_UTTERANCES = {
+    "get_temperature": [
+        "how hot is it in pune", "what is the temperature in mumbai", "weather in london",
+        "how cold is it in delhi", "temperature in tokyo", "is it warm in paris today",
+        "what's the weather like in berlin", "tell me the temperature in chennai",
+    ],
+    "get_time": [
+        "what time is it in london", "current time in tokyo", "what's the time in dubai",
+        "tell me the time in new york", "what is the local time in sydney",
+    ],
+    "open_application": [
+        "launch notepad", "start calculator", "run paint", "fire up chrome",
+        "please launch the task manager", "start the command prompt", "open up spotify app",
+    ],
+    "open_website": [
+        "go to youtube.com", "visit github.com", "take me to wikipedia.org",
+        "browse to news.ycombinator.com", "load the site example.com",
+    ],
+    "search_web": [
+        "google machine learning", "look up python tutorials", "find information about black holes",
+        "search for cheap flights to goa", "look up reviews of the new phone", "look up the best laptops",
+    ],
+    "create_folder": [
+        "make a new folder called projects", "new folder named photos", "add a folder called invoices",
+    ],
+    "create_file": [
+        "make a new file called notes", "new text file named todo", "add a file called report",
+        "create a file named budget",
+    ],
+    "sort_desktop_files": [
+        "clean up my desktop", "tidy the desktop", "arrange desktop files by type",
+        "sort out the files on my desktop",
+    ],
+    "get_system_info": [
+        "how much memory am i using", "check ram usage", "how much disk space is left",
+        "show system status", "how is my computer doing",
+    ],
+    None: [
+        "tell me a joke", "who is the president of france", "explain quantum physics simply",
+        "what is the capital of japan", "how are you today", "write a short poem about rain",
+        "what does photosynthesis mean", "who won the world cup in 2011", "thank you luna",
+        "what can you do", "summarize the plot of hamlet",
+        # General-knowledge questions that share words with tool requests
+        "what is the boiling point of water", "what temperature does water freeze at",
+        "how much memory does a computer need", "how much ram does a phone have",
+        "how do i start a car in winter", "start a story about dragons", "run me through the rules of chess",
+        "what is the time complexity of quicksort", "how hot is the sun",
+    ],
+}
+
+# Argument extraction per tool. The first pattern that matches wins.
+_CITY = r"\b(?:in|for|at)\s+(?P<city>[a-z][a-z .'-]*?)(?:\s+(?:today|now|right now|currently|please))?[?.!]*$"
+_CITY_TAIL = re.compile(_CITY)
+ARGUMENT_PATTERNS = {
+    "get_temperature": [_CITY],
+    "get_time": [_CITY],
+    "open_application": [
+        r"^(?:please\s+)?(?:launch|start|run|fire up|open up|open)\s+(?:the\s+)?(?P<app_name>.+?)(?:\s+app(?:lication)?)?[?.!]*$",
+    ],
+    "open_website": [r"(?P<url_or_query>(?:https?://)?[a-z0-9-]+(?:\.[a-z0-9-]+)+\S*)"],
+    "search_web": [
+        r"^(?:please\s+)?(?:google|look up|search for|search|find information about|find)\s+(?P<query>.+?)[?.!]*$",
+    ],
+    "create_folder": [r"folder\s+(?:called|named)\s+(?P<folder_name>.+?)[?.!]*$"],
+    "create_file": [r"file\s+(?:called|named)\s+(?P<filename>.+?)[?.!]*$"],
+}
+
+# A captured argument containing one of these words is not a name: "how cold is
+# it in the fridge", "in here", "in kelvin of absolute zero", "launch a rocket".
+# The pattern is skipped and, with no other match, the command goes to Gemini.
+_NOT_A_NAME = {"a", "an", "the", "my", "your", "our", "this", "that", "it", "me", "here", "there"}
+REJECTED_WORDS = {
+    "city": _NOT_A_NAME | {"of", "kelvin", "celsius", "fahrenheit"},
+    "app_name": _NOT_A_NAME,
+}
+
+# Held-out commands used to measure routing accuracy (python intent_classifier.py).
+# None of these, or close rewordings of them, may be added to EXAMPLE_UTTERANCES.
+EVALUATION_COMMANDS = [
+    ("how hot is it in pune", "get_temperature"),
+    ("what's the temperature in bangalore right now", "get_temperature"),
+    ("is it cold in moscow", "get_temperature"),
+    ("what time is it in paris", "get_time"),
+    ("time in tokyo please", "get_time"),
+    ("launch vlc", "open_application"),
+    ("start the calculator", "open_application"),
+    ("go to stackoverflow.com", "open_website"),
+    ("look up the best pizza near me", "search_web"),
+    ("search for flights to london", "search_web"),
+    ("make a new folder called music", "create_folder"),
+    ("create a file called shopping list", "create_file"),
+    ("please clean up my desktop", "sort_desktop_files"),
+    ("how much ram am i using", "get_system_info"),
+    ("how much disk space do i have", "get_system_info"),
+    ("tell me a fun fact", None),
+    ("who wrote pride and prejudice", None),
+    ("explain how vaccines work", None),
+    ("what's the meaning of life", None),
+    ("good morning luna", None),
+    ("what is the average temperature on mars", None),
+    ("how many gigabytes is a blu-ray disc", None),
+    ("how much space does a human brain hold", None),
+    ("what time zone is australia in", None),
+    ("what's a good time to visit japan", None),
+    ("start me off with an easy riddle", None),
+    ("run through the history of rome", None),
+    ("why is the sky blue", None),
+]
+
+
+def load_tools(path=TOOLS_PATH):
+    """Loads the tool schemas luna.py registers with Gemini."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+_POLITE = re.compile(r"^please\s+|\s+please$")
+
+
+def _is_name(value, argument):
+    return bool(value) and not set(value.split()) & REJECTED_WORDS.get(argument, set())
+
+
+def parse_fixed_command(command):
+    """
+    Parses luna's fixed command phrases ("open notepad", "search for flights",
+    "time in tokyo") into (tool_name, arguments), or returns None.
+    """
+    cmd = _POLITE.sub("", command.lower().strip().rstrip("?!").strip()).strip()
+    if cmd.startswith("open "):
+        name = cmd[len("open "):].strip()
+        if name.startswith("up "):
+            name = name[len("up "):].strip()
+        # Drive letter (c, d:), an existing path, or the desktop
+        if (len(name) <= 2 and (name.isalpha() or ':' in name)) or os.path.exists(name) or 'desktop' in name:
+            return "open_folder_or_drive", {"path": name}
+        if "." in name or name.startswith("http"):
+            return "open_website", {"url_or_query": name}
+        name = re.sub(r"\s+app(?:lication)?$", "", name).rstrip(".")
+        return ("open_application", {"app_name": name}) if _is_name(name, "app_name") else None
+    for prefix in ("search the web for ", "search web for ", "search for ", "search "):
+        if cmd.startswith(prefix):
+            query = cmd[len(prefix):].strip()
+            return ("search_web", {"query": query}) if query else None
+    for prefix in ("create folder ", "make folder "):
+        if cmd.startswith(prefix):
+            return "create_folder", {"folder_name": cmd[len(prefix):].strip()}
+    if cmd.startswith("create file "):
+        return "create_file", {"filename": cmd[len("create file "):].strip()}
+    if cmd.startswith("delete file "):
+        return "delete_file", {"filename": cmd[len("delete file "):].strip()}
+    if cmd.startswith("move file ") and " to " in cmd:
+        filename, destination = cmd[len("move file "):].split(" to ", 1)
+        return "move_file", {"filename": filename.strip(), "destination_folder": destination.strip()}
+    if "sort desktop" in cmd or "sort my desktop" in cmd or "organize desktop" in cmd:
+        return "sort_desktop_files", {}
+    if "system info" in cmd or "system information" in cmd:
+        return "get_system_info", {}
+    if cmd.startswith("time in "):
+        match = _CITY_TAIL.search(cmd)
+        if match and _is_name(match.group("city"), "city"):
+            return "get_time", {"city": match.group("city").strip()}
+    return None
+
+
+def _features(text):
+    """
+    Word unigrams and bigrams plus character trigrams of a normalized command.
+    A trailing place name is dropped first, so "weather in new york" is matched
+    on "weather in" rather than on a city some get_time example happens to use.
+    """
+    text = text.lower()
+    place = _CITY_TAIL.search(text)
+    if place:
+        text = text[:place.start("city")]
+    words = re.findall(r"[a-z0-9']+", text)
+    features = list(words)
+    features += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f" {word} "
+        features += [f"#{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return features
+
+
+class IntentClassifier:
+    """Nearest-example TF-IDF classifier mapping a spoken command to a tool name and arguments."""
+
+    def __init__(self, examples=EXAMPLE_UTTERANCES, tools=None, threshold=CONFIDENCE_THRESHOLD):
+        self.threshold = threshold
+        # Arguments a route must have; taken from the tool schema when given
+        self.required = {
+            name: sorted({group for pattern in ARGUMENT_PATTERNS.get(name, [])
+                          for group in re.compile(pattern).groupindex})
+            for name in examples if name is not None
+        }
+        documents, labels = [], []
+        for tool_name, utterances in examples.items():
+            for utterance in utterances:
+                documents.append(utterance)
+                labels.append(tool_name)
+        for tool in tools or []:
+            self.required[tool["name"]] = tool.get("parameters", {}).get("required", [])
+            if tool["name"] in examples and tool.get("description"):
+                documents.append(tool["description"])
+                labels.append(tool["name"])
+        self.labels = labels
+
+        # Vocabulary and IDF weights from the example documents
+        doc_features = [_features(doc) for doc in documents]
+        self.vocab = {}
+        for features in doc_features:
+            for feature in features:
+                self.vocab.setdefault(feature, len(self.vocab))
+        counts = np.zeros((len(documents), len(self.vocab)), dtype=np.float32)
+        for row, features in enumerate(doc_features):
+            for feature in features:
+                counts[row, self.vocab[feature]] += 1
+        df = np.count_nonzero(counts, axis=0)
+        self.idf = (np.log((1 + len(documents)) / (1 + df)) + 1).astype(np.float32)
+        self.matrix = self._normalize(counts * self.idf)
+
+        self.routed = 0
+        self.deferred = 0
+        self.latencies = deque(maxlen=1000)
+
+    @staticmethod
+    def _normalize(m):
+        norms = np.linalg.norm(m, axis=-1, keepdims=True)
+        return m / np.where(norms == 0, 1, norms)
+
+    def _vectorize(self, text):
+        vector = np.zeros(len(self.vocab), dtype=np.float32)
+        for feature in _features(text):
+            index = self.vocab.get(feature)
+            if index is not None:
+                vector[index] += 1
+        return self._normalize(vector * self.idf)
+
+    def _extract_arguments(self, tool_name, command):
+        for pattern in ARGUMENT_PATTERNS.get(tool_name, []):
+            match = re.search(pattern, command)
+            if not match:
+                continue
+            args = {k: v.strip() for k, v in match.groupdict().items() if v and v.strip()}
+            if all(_is_name(value, name) for name, value in args.items()):
+                return args
+        return {}
+
+    def predict(self, command):
+        """Returns (tool_name, score) for the closest example; tool_name is None for chat."""
+        scores = self.matrix @ self._vectorize(command)
+        best = int(np.argmax(scores))
+        return self.labels[best], float(scores[best])
+
+    def classify(self, command):
+        """
+        Returns (tool_name, arguments, score) when the command can be routed locally,
+        or None when it should go to Gemini. Fixed command phrases are matched
+        first with score 1.0; everything else goes through the classifier.
+        """
+        start = time.perf_counter()
+        command = command.lower().strip()
+        fixed = parse_fixed_command(command)
+        tool_name, score = (fixed[0], 1.0) if fixed else self.predict(command)
+        route = None
+        if fixed:
+            route = (fixed[0], fixed[1], score)
+        elif tool_name is not None and score >= self.threshold:
+            args = self._extract_arguments(tool_name, command)
+            required = self.required.get(tool_name, [])
+            if all(args.get(name) for name in required):
+                route = (tool_name, args, score)
+        self.latencies.append(time.perf_counter() - start)
+        if route:
+            self.routed += 1
+        else:
+            self.deferred += 1
+        return route
+
+    def evaluate(self, samples=EVALUATION_COMMANDS):
+        """Routes labelled commands and returns accuracy and the share kept off the LLM."""
+        correct = local = 0
+        for command, expected in samples:
+            route = self.classify(command)
+            predicted = route[0] if route else None
+            correct += predicted == expected
+            local += route is not None
+        return {"accuracy": correct / len(samples), "local_share": local / len(samples)}
+
+    def stats(self):
+        total = self.routed + self.deferred
+        latencies = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        return {
+            "commands": total,
+            "local_share": self.routed / total if total else 0.0,
+            "median_ms": float(np.median(latencies)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+        }
+
+    def report(self):
+        s = self.stats()
+        return (f"Intent classifier: {s['local_share']:.0%} of {s['commands']} commands handled locally, "
+                f"median {s['median_ms']:.2f} ms, p95 {s['p95_ms']:.2f} ms per command.")
+
+
+if __name__ == "__main__":
+    # Same configuration luna.py deploys
+    classifier = IntentClassifier(tools=load_tools())
+    results = classifier.evaluate()
+    print(f"Routing accuracy: {results['accuracy']:.0%}")
+    print(f"Share of commands taken off the LLM: {results['local_share']:.0%}")
+    print(classifier.report())
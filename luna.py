@@ -1,5 +1,4 @@
 import speech_recognition as sr
-import pyttsx3
 import os
 import subprocess
 import webbrowser
@@ -8,9 +7,11 @@ import shutil
 import pyautogui
 import requests
 import time
+import json
 from datetime import datetime
 import pytz
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 import sys
 
 try:
@@ -19,6 +20,11 @@ except Exception:
     win32com = None
 import smtplib
 from email.message import EmailMessage
+from tts_server import TTSClient
+from intent_classifier import IntentClassifier, TOOLS_PATH
+from app_catalog import AppCatalog, launch
+from resilience import ResilientCaller, CircuitOpenError, DeadlineExceeded
+from conversation_store import ConversationStore
 
 # --- 1. API KEY AND GLOBAL INITIALIZATIONS ---
 
@@ -34,46 +40,50 @@ except ValueError as e:
     print(e)
     sys.exit(1) # Use sys.exit(1) for clean failure
 
-try:
-    engine = pyttsx3.init('sapi5')
-except Exception:
-    engine = pyttsx3.init()
+# Callables registered here receive every line Luna logs (e.g. the GUI log view)
+log_listeners = []
+
+def log(message):
+    """Prints a message and forwards it to any registered log listeners."""
+    print(message)
+    for listener in list(log_listeners):
+        try:
+            listener(message)
+        except Exception:
+            pass
+
+# Speech runs in a separate process so engine failures never stall the assistant
+tts = TTSClient(rate=180, volume=1.0, log=log)
+tts.start()
 recognizer = sr.Recognizer()
 recognizer.pause_threshold = 0.6
 recognizer.dynamic_energy_threshold = True
 recognizer.energy_threshold = 300
-try:
-    engine.setProperty('rate', 180)
-    engine.setProperty('volume', 1.0)
-except Exception:
-    pass
 
-# --- 2. DEFINE ALL SKILL FUNCTIONS FIRST ---
+# Installed applications, loaded from disk and brought up to date in the background
+app_catalog = AppCatalog(log=log)
+if app_catalog.load():
+    app_catalog.refresh_in_background()
+else:
+    app_catalog.refresh()
+
+# Outbound calls get deadlines, jittered retries, hedging and a circuit breaker
+def _is_retryable_http(exc):
+    """Connection problems, timeouts, 429 and 5xx are worth retrying; other HTTP errors are final."""
+    if isinstance(exc, requests.exceptions.HTTPError) and exc.response is not None:
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return isinstance(exc, requests.exceptions.RequestException)
+
+def _is_retryable_gemini(exc):
+    return isinstance(exc, (google_exceptions.ServerError, google_exceptions.TooManyRequests,
+                            ConnectionError, TimeoutError))
+
+weather_caller = ResilientCaller("weather service", deadline=8.0, retries=2,
+                                 default_hedge_delay=1.5, is_retryable=_is_retryable_http)
+gemini_caller = ResilientCaller("Gemini", deadline=20.0, retries=1,
+                                default_hedge_delay=4.0, is_retryable=_is_retryable_gemini)
 
-def speak(text):
-    """Converts text to speech."""
-    global engine
-    print(f"LUNA: {text}")
-    try:
-        engine.stop()
-        engine.say(str(text))
-        engine.runAndWait()
-    except Exception:
-        # Try to re-init engine once if speaking fails
-        try:
-            try:
-                engine = pyttsx3.init('sapi5')
-            except Exception:
-                engine = pyttsx3.init()
-            try:
-                engine.setProperty('rate', 180)
-                engine.setProperty('volume', 1.0)
-            except Exception:
-                pass
-            engine.say(str(text))
-            engine.runAndWait()
-        except Exception:
-            pass
+# --- 2. DEFINE ALL SKILL FUNCTIONS FIRST ---
 
 def calibrate_microphone(duration: float = 1.0):
     """Calibrates ambient noise once to speed up subsequent recognition."""
@@ -102,7 +112,7 @@ def refresh_desktop():
         pyautogui.press('f5')
         time.sleep(0.1) 
     except Exception as e:
-        print(f"Warning: Could not force desktop refresh. Error: {e}")
+        log(f"Warning: Could not force desktop refresh. Error: {e}")
 
 # --- NEW FUNCTION: CREATE FOLDER ---
 def create_folder(folder_name: str):
@@ -248,30 +258,18 @@ def sort_desktop_files():
 
 # --- UNMODIFIED FUNCTIONS (Return values already added in previous step) ---
 def open_application(app_name: str):
-    """Opens a common Windows application by name."""
+    """Opens an installed application by its spoken name using the app catalog."""
     try:
-        app_name_lower = (app_name or '').lower()
-        app_map = {
-            'notepad': 'notepad.exe',
-            'calculator': 'calc.exe',
-            'paint': 'mspaint.exe',
-            'command prompt': 'cmd.exe',
-            'cmd': 'cmd.exe',
-            'powershell': 'powershell.exe',
-            'explorer': 'explorer.exe',
-            'wordpad': 'write.exe',
-            'control panel': 'control.exe',
-            'task manager': 'taskmgr.exe',
-        }
-        exe = app_map.get(app_name_lower)
-        if exe:
-            subprocess.Popen([exe])
-            speak(f"Opening {app_name}.")
-            return f"Application '{app_name}' opened."
-        # Try start if not in map
-        subprocess.Popen(["start", app_name], shell=True)
-        speak(f"Trying to open {app_name}.")
-        return f"Attempted to open application '{app_name}' using start command."
+        entry = app_catalog.lookup(app_name)
+        if entry is None and app_catalog.refresh():
+            # Something was installed since the catalog was last refreshed
+            entry = app_catalog.lookup(app_name)
+        if entry is None:
+            speak(f"I couldn't find an application called {app_name}.")
+            return f"Failure: Application '{app_name}' not found."
+        launch(entry)
+        speak(f"Opening {app_name}.")
+        return f"Application '{app_name}' opened."
     except Exception as e:
         speak(f"Sorry, I couldn't open {app_name}. Error: {e}")
         return f"Failure: Could not open application. Error: {e}"
@@ -415,9 +413,12 @@ def get_temperature(city: str):
         # API endpoint URL
         url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
         
-        # Make the request
-        response = requests.get(url, timeout=5)
-        response.raise_for_status() # Raise an exception for bad status codes (4xx or 5xx)
+        # Make the request (retried and hedged by weather_caller within its deadline)
+        def fetch(timeout):
+            response = requests.get(url, timeout=min(timeout, 5))
+            response.raise_for_status() # Raise an exception for bad status codes (4xx or 5xx)
+            return response
+        response = weather_caller.call(fetch)
 
         # Parse the JSON data
         weather_data = response.json()
@@ -442,11 +443,18 @@ def get_temperature(city: str):
         speak(reply)
         return reply
 
+    except CircuitOpenError:
+        speak("The weather service seems to be down right now. Please try again in a little while.")
+        return "Failure: Weather service unavailable."
+    except DeadlineExceeded:
+        speak("Sorry, the weather service is taking too long to respond.")
+        return "Failure: Weather request timed out."
     except requests.exceptions.HTTPError as http_err:
-        if response.status_code == 401:
+        status_code = http_err.response.status_code if http_err.response is not None else None
+        if status_code == 401:
             speak("The weather API key is invalid. Please check it.")
             return "Failure: Invalid API key."
-        elif response.status_code == 404:
+        elif status_code == 404:
             speak(f"I couldn't find the city {city}. Please check the spelling.")
             return "Failure: City not found."
         else:
@@ -468,26 +476,17 @@ CHAT_SYSTEM_PROMPT = (
 )
 # MODEL CHANGE APPLIED HERE
 chat_model = genai.GenerativeModel(MODEL_NAME, system_instruction=CHAT_SYSTEM_PROMPT)
-chat_session = chat_model.start_chat(history=[])
+# Resume the latest conversation from the local store instead of starting empty
+conversation_store = ConversationStore()
+_resume_start = time.perf_counter()
+_resumed_history = conversation_store.recent_history()
+chat_session = chat_model.start_chat(history=_resumed_history)
+log(f"Resumed {len(_resumed_history)} earlier turns in {(time.perf_counter() - _resume_start) * 1000:.1f} ms.")
 
 # Define the tools (our Python functions) for the model
-tools = [
-    # --- NEW TOOLS ADDED ---
-    { "name": "create_folder", "description": "Creates a new folder (directory) on the desktop.", "parameters": { "type": "OBJECT", "properties": { "folder_name": { "type": "STRING", "description": "The name of the new folder." } }, "required": ["folder_name"] } },
-    { "name": "open_folder_or_drive", "description": "Opens a specific folder path, or a drive (like C: or D:) in File Explorer.", "parameters": { "type": "OBJECT", "properties": { "path": { "type": "STRING", "description": "The name of the folder, or the drive letter (e.g., 'C drive')." } }, "required": ["path"] } },
-    # ----------------------
-    { "name": "create_file", "description": "Creates a new file on the desktop.", "parameters": { "type": "OBJECT", "properties": { "filename": { "type": "STRING", "description": "The name of the file." } }, "required": ["filename"] } },
-    { "name": "delete_file", "description": "Deletes a file from the desktop.", "parameters": { "type": "OBJECT", "properties": { "filename": { "type": "STRING" } }, "required": ["filename"] } },
-    { "name": "move_file", "description": "Moves a desktop file to a folder on desktop.", "parameters": { "type": "OBJECT", "properties": { "filename": { "type": "STRING" }, "destination_folder": { "type": "STRING" } }, "required": ["filename", "destination_folder"] } },
-    { "name": "sort_desktop_files", "description": "Sorts desktop files into folders by extension.", "parameters": { "type": "OBJECT", "properties": {} } },
-    { "name": "open_application", "description": "Opens a Windows application by name.", "parameters": { "type": "OBJECT", "properties": { "app_name": { "type": "STRING" } }, "required": ["app_name"] } },
-    { "name": "open_website", "description": "Opens a website or URL.", "parameters": { "type": "OBJECT", "properties": { "url_or_query": { "type": "STRING" } }, "required": ["url_or_query"] } },
-    { "name": "search_web", "description": "Searches the web.", "parameters": { "type": "OBJECT", "properties": { "query": { "type": "STRING" } }, "required": ["query"] } },
-    { "name": "send_email", "description": "Sends an email via SMTP or Outlook.", "parameters": { "type": "OBJECT", "properties": { "to": { "type": "STRING" }, "subject": { "type": "STRING" }, "body": { "type": "STRING" } }, "required": ["to"] } },
-    { "name": "get_system_info", "description": "Reports RAM and disk usage.", "parameters": { "type": "OBJECT", "properties": {} } },
-    { "name": "get_time", "description": "Finds the current time in a city.", "parameters": { "type": "OBJECT", "properties": { "city": { "type": "STRING", "description": "The city name." } }, "required": ["city"] } },
-    { "name": "get_temperature", "description": "Gets current temperature for a city (OpenWeatherMap)", "parameters": { "type": "OBJECT", "properties": { "city": { "type": "STRING", "description": "The city name." } }, "required": ["city"] } }
-]
+# Tool schemas live in tools.json so the local intent classifier can be evaluated without Gemini
+with open(TOOLS_PATH, 'r', encoding='utf-8') as f:
+    tools = json.load(f)
 
 # MODEL CHANGE APPLIED HERE
 tool_model = genai.GenerativeModel(MODEL_NAME, tools=tools)
@@ -511,40 +510,38 @@ available_tools = {
     "get_temperature":get_temperature,
 }
 
+# Local classifier for plain tool requests; anything it is unsure about goes to Gemini
+intent_classifier = IntentClassifier(tools=tools)
+
 # --- 4. MAIN LOGIC AND EXECUTION LOOP ---
+def send_chat_message(message):
+    """
+    Sends one turn to the chat session through gemini_caller. The history is
+    updated only with the response that won, so hedged duplicates never leak in.
+    """
+    contents = list(chat_session.history) + [{"role": "user", "parts": [message]}]
+    response = gemini_caller.call(
+        lambda timeout: chat_model.generate_content(contents, request_options={"timeout": timeout}))
+    chat_session.history = contents + [response.candidates[0].content]
+    return response
+
 def speak(text_to_speak):
     """
-    Converts text to speech with a fallback to re-initialize the engine
-    in case of a conflict with the microphone.
+    Converts text to speech through the TTS server process. If the engine
+    crashes or hangs it is restarted in the background, and the phrase that
+    failed is retried once on the fresh engine.
     """
-    global engine
-    print(f"LUNA: {text_to_speak}")
-    try:
-        engine.say(str(text_to_speak))
-        engine.runAndWait()
-    except Exception as e:
-        print(f"--- TTS Error: {e}. Attempting to reset engine. ---")
-        # --- Fallback Routine ---
-        try:
-            # Re-initialize the engine
-            engine = pyttsx3.init()
-            engine.setProperty('rate', 180)
-            engine.setProperty('volume', 1.0)
-            
-            # Retry speaking
-            engine.say(str(text_to_speak))
-            engine.runAndWait()
-        except Exception as e2:
-            print(f"--- TTS Fallback Failed: {e2} ---")
+    log(f"LUNA: {text_to_speak}")
+    tts.say(str(text_to_speak))
             
 def listen_for_command():
     """Listens for a command and converts it to text."""
     with sr.Microphone() as source:
-        print("Listening for your command...")
+        log("Listening for your command...")
         audio = recognizer.listen(source, timeout=10, phrase_time_limit=10)
     try:
         command = recognizer.recognize_google(audio).lower()
-        print(f"You said: {command}")
+        log(f"You said: {command}")
         return command
     except sr.UnknownValueError:
         speak("Sorry, I did not understand that.")
@@ -554,67 +551,32 @@ def listen_for_command():
         return None
 
 def handle_local_intents(command: str) -> bool:
-    """Fast path for common commands without LLM. Returns True if handled."""
+    """
+    Luna's own commands (history search, stats, chat reset). Returns True if handled.
+    Fixed tool phrases like "open notepad" are parsed by the intent classifier.
+    """
     cmd = command.lower().strip()
     try:
-        # --- UPDATED OPEN LOGIC TO HANDLE FOLDERS/DRIVES ---
-        if cmd.startswith("open "):
-            name = cmd.replace("open ", "", 1).strip()
-            
-            # Check for drive letter (C, D:, C drive) or explicit path
-            is_drive_or_path = (len(name) <= 2 and (name.isalpha() or ':' in name)) or os.path.exists(name) or 'desktop' in name
-            
-            if is_drive_or_path:
-                open_folder_or_drive(name)
-                return True
-            
-            # If it doesn't look like a drive/folder, check for website/application
-            if "." in name or name.startswith("http"):
-                open_website(name)
+        if cmd.startswith("search history for ") or cmd.startswith("search conversations for "):
+            query = cmd.split(" for ", 1)[1].strip()
+            matches = conversation_store.search(query)
+            if matches:
+                ts, _, text = matches[0]
+                when = datetime.fromtimestamp(ts).strftime("%B %d at %I:%M %p")
+                speak(f"I found {len(matches)} matches. The latest, from {when}: {text[:200]}")
             else:
-                open_application(name)
+                speak(f"I couldn't find anything about {query} in our past conversations.")
             return True
-        # --------------------------------------------------
-        
-        if cmd.startswith("search ") or cmd.startswith("search web for "):
-            query = cmd.replace("search web for ", "", 1).replace("search ", "", 1).strip()
-            search_web(query)
-            return True
-            
-        # --- NEW FAST PATH ADDED ---
-        if cmd.startswith("create folder ") or cmd.startswith("make folder "):
-            folder_name = cmd.replace("create folder ", "", 1).replace("make folder ", "", 1).strip()
-            create_folder(folder_name)
-            return True
-        # ---------------------------
-        
-        if cmd.startswith("create file "):
-            filename = cmd.replace("create file ", "", 1).strip()
-            create_file(filename)
-            return True
-        if cmd.startswith("delete file "):
-            filename = cmd.replace("delete file ", "", 1).strip()
-            delete_file(filename)
+        if "speech cache stats" in cmd or "voice cache stats" in cmd:
+            speak(tts.report())
             return True
-        if cmd.startswith("move file ") and " to " in cmd:
-            rest = cmd.replace("move file ", "", 1)
-            parts = rest.split(" to ", 1)
-            if len(parts) == 2:
-                move_file(parts[0].strip(), parts[1].strip())
-                return True
-        if "sort desktop" in cmd or "sort my desktop" in cmd or "organize desktop" in cmd:
-            sort_desktop_files()
-            return True
-        if "system info" in cmd or "system information" in cmd:
-            get_system_info()
-            return True
-        if cmd.startswith("time in "):
-            city = cmd.replace("time in ", "", 1).strip()
-            get_time(city)
+        if "intent stats" in cmd or "routing stats" in cmd:
+            speak(intent_classifier.report())
             return True
         if cmd in ("reset chat", "clear chat", "reset conversation"):
             global chat_session
             chat_session = chat_model.start_chat(history=[])
+            conversation_store.start_session()
             speak("Chat history cleared.")
             return True
     except Exception:
@@ -632,12 +594,26 @@ def process_command(command):
 
     # Handle exit commands
     if "goodbye" in command or "exit" in command:
+        log(tts.report())
+        log(intent_classifier.report())
         speak("Goodbye!")
+        tts.close()
         sys.exit()
 
+    # Fast paths: luna's own commands, then fixed tool phrases and the intent
+    # classifier (the same order intent_classifier.evaluate() measures)
+    if handle_local_intents(command):
+        return
+    route = intent_classifier.classify(command)
+    if route:
+        tool_name, tool_args, score = route
+        log(f"-> Calling Tool locally: {tool_name}({tool_args}) [confidence {score:.2f}]")
+        available_tools[tool_name](**tool_args)
+        return
+
     try:
         # Send the user's command to the ongoing chat session
-        response = chat_session.send_message(command)
+        response = send_chat_message(command)
         
         # Loop through the response parts to find and execute any function calls
         for part in response.candidates[0].content.parts:
@@ -647,14 +623,14 @@ def process_command(command):
                 tool_name = function_call.name
                 tool_args = dict(function_call.args)
                 
-                print(f"-> Calling Tool: {tool_name}({tool_args})")
+                log(f"-> Calling Tool: {tool_name}({tool_args})")
                 
                 # Find and execute the correct function from our available tools
                 if tool_name in available_tools:
                     result = available_tools[tool_name](**tool_args)
                     
                     # Send the tool's result back to the model
-                    response = chat_session.send_message(
+                    response = send_chat_message(
                         genai.Part(function_response=genai.protos.FunctionResponse(
                             name=tool_name,
                             response={"result": str(result)} # Send result back as a string
@@ -663,10 +639,17 @@ def process_command(command):
 
         # After any tool calls, if there is a final text response, speak it
         if response.text and response.text.strip():
+            # Persist the exchange so the conversation survives restarts
+            conversation_store.append("user", command)
+            conversation_store.append("model", response.text)
             speak(response.text)
 
+    except CircuitOpenError:
+        speak("My AI service is unavailable right now. Local commands still work, so please try again in a little while.")
+    except DeadlineExceeded:
+        speak("Sorry, that took too long to answer. Please try again.")
     except Exception as e:
-        print(f"Error processing command: {e}")
+        log(f"Error processing command: {e}")
         speak("Sorry, I ran into a little trouble with that request.")
 
         
@@ -676,7 +659,7 @@ def main():
     speak("Luna is online. Say the wake word to begin.")
     calibrate_microphone(1.0)
     while True:
-        print("Listening for wake word...")
+        log("Listening for wake word...")
         with sr.Microphone() as source:
             try:
                 audio = recognizer.listen(source, timeout=10, phrase_time_limit=7)
@@ -692,7 +675,7 @@ def main():
         except sr.UnknownValueError:
             continue
         except sr.RequestError: 
-            print("Could not request results; check your internet connection.")
+            log("Could not request results; check your internet connection.")
             time.sleep(5)
 
 if __name__ == "__main__":
@@ -1,11 +1,19 @@
 # luna_gui.py
 import customtkinter as ctk
 import threading
+import queue
+import os
 import sys
+from collections import deque
 import speech_recognition as sr
 import pyttsx3
 import time
-from luna import calibrate_microphone, listen_for_command, process_command, speak
+from luna import calibrate_microphone, listen_for_command, process_command, speak, log_listeners
+
+# Log view settings: the textbox keeps only the newest lines, older ones go to a file
+LOG_MAX_LINES = 500
+LOG_FRAME_MS = 50
+LOG_HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".luna", "luna_log.txt")
 
 # Appearance Settings
 ctk.set_appearance_mode("dark")
@@ -27,6 +35,16 @@ class AssistantApp(ctk.CTk):
         self.log_textbox = ctk.CTkTextbox(self, state="disabled", wrap="word", font=("Arial", 14))
         self.log_textbox.grid(row=0, column=0, padx=20, pady=(20, 10), sticky="nsew")
 
+        # Messages from any thread land in the queue and are inserted in one batch per frame.
+        # The ring holds what the textbox currently shows; evicted entries spill to the history file.
+        self._log_queue = queue.Queue()
+        self._log_ring = deque()
+        self._log_ring_lines = 0
+        os.makedirs(os.path.dirname(LOG_HISTORY_PATH), exist_ok=True)
+        self._log_history = open(LOG_HISTORY_PATH, "a", encoding="utf-8")
+        log_listeners.append(self.log_message)
+        self.after(LOG_FRAME_MS, self._drain_log_queue)
+
         # Activate button
         self.activate_button = ctk.CTkButton(self, text="Activate Luna", command=self.on_activate_button_click, font=("Arial", 16), height=50)
         self.activate_button.grid(row=1, column=0, padx=20, pady=(10, 20), sticky="ew")
@@ -59,18 +77,65 @@ class AssistantApp(ctk.CTk):
         self.activate_button.configure(state="normal", text="Activate Luna")
         
     def log_message(self, message):
-        """ Thread-safe method to append a message to the log text box. """
-        self.after(0, self._update_log_textbox, message)
+        """ Thread-safe method to queue a message for the log text box. """
+        self._log_queue.put(message)
+
+    def _drain_log_queue(self):
+        """ Runs once per frame on the main thread and applies all queued messages in one update. """
+        batch = []
+        try:
+            while True:
+                batch.append(self._log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if batch:
+            self._update_log_textbox(batch)
+        self.after(LOG_FRAME_MS, self._drain_log_queue)
 
-    def _update_log_textbox(self, message):
+    def _update_log_textbox(self, messages):
         """ Internal method that performs the actual GUI update on the main thread. """
+        shown = len(self._log_ring)
+        for message in messages:
+            entry = message + "\n\n"
+            self._log_ring.append(entry)
+            self._log_ring_lines += entry.count("\n")
+
+        # Trim the window back to LOG_MAX_LINES, oldest entries first
+        evicted = []
+        while self._log_ring_lines > LOG_MAX_LINES and len(self._log_ring) > 1:
+            entry = self._log_ring.popleft()
+            self._log_ring_lines -= entry.count("\n")
+            evicted.append(entry)
+        self._spill_log_history(evicted)
+
+        # Entries evicted from this batch never reach the widget at all
+        new_count = len(messages) - max(0, len(evicted) - shown)
+        stale_lines = sum(entry.count("\n") for entry in evicted[:shown])
+
         self.log_textbox.configure(state="normal")
-        self.log_textbox.insert("end", message + "\n\n")
+        if stale_lines:
+            self.log_textbox.delete("1.0", f"{stale_lines + 1}.0")
+        if new_count:
+            self.log_textbox.insert("end", "".join(list(self._log_ring)[-new_count:]))
         self.log_textbox.configure(state="disabled")
         self.log_textbox.see("end") # Auto-scroll to the bottom
 
+    def _spill_log_history(self, entries):
+        """ Appends entries that scrolled out of the log window to the history file. """
+        if not entries:
+            return
+        try:
+            self._log_history.write("".join(entries))
+            self._log_history.flush()
+        except Exception:
+            pass
+
     def on_closing(self):
         """ Handles the window closing event. """
+        if self.log_message in log_listeners:
+            log_listeners.remove(self.log_message)
+        self._spill_log_history(list(self._log_ring))
+        self._log_history.close()
         self.destroy()
         sys.exit()
 
@@ -0,0 +1,162 @@
+# resilience.py
+# Deadlines, jittered retries, hedged requests and circuit breaking for Luna's
+# outbound calls (Gemini and the weather API).
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the service while its circuit breaker is open."""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a call and its retries did not finish within the deadline."""
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets a single trial call through after reset_timeout."""
+
+    def __init__(self, failure_threshold=4, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class ResilientCaller:
+    """
+    Wraps calls to one upstream service. Each call gets a deadline, retries with
+    full-jitter backoff, and a hedged duplicate once it runs longer than the
+    recent p95 latency.
+    """
+
+    def __init__(self, name, deadline=15.0, retries=2, backoff=0.5, hedge=True,
+                 min_hedge_delay=0.2, default_hedge_delay=2.0, is_retryable=None, breaker=None):
+        self.name = name
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge = hedge
+        self.min_hedge_delay = min_hedge_delay
+        self.default_hedge_delay = default_hedge_delay
+        self.is_retryable = is_retryable or (lambda exc: True)
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = deque(maxlen=200)
+        self.calls = self.retried = self.hedged = self.hedge_wins = self.rejected = 0
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix=f"{name}-call")
+
+    def hedge_delay(self):
+        """p95 of recent successful latencies, or a default until there is enough data."""
+        if len(self.latencies) < 20:
+            return self.default_hedge_delay
+        ordered = sorted(self.latencies)
+        return max(self.min_hedge_delay, ordered[int(len(ordered) * 0.95) - 1])
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Runs fn(*args, **kwargs, timeout=<seconds left>) under the deadline.
+        Raises CircuitOpenError, DeadlineExceeded or the last non-retryable error.
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError(f"{self.name} is unavailable")
+        self.calls += 1
+        give_up_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            try:
+                result = self._hedged_attempt(fn, args, kwargs, give_up_at)
+                self.breaker.record_success()
+                return result
+            except Exception as e:
+                retryable = isinstance(e, DeadlineExceeded) or self.is_retryable(e)
+                if not retryable:
+                    # The service answered (e.g. 404); it is not degraded
+                    self.breaker.record_success()
+                    raise
+                # Full jitter keeps retries from many callers from lining up
+                sleep_for = random.uniform(0, self.backoff * (2 ** attempt))
+                if attempt >= self.retries or time.monotonic() + sleep_for >= give_up_at:
+                    self.breaker.record_failure()
+                    raise
+            attempt += 1
+            self.retried += 1
+            time.sleep(sleep_for)
+
+    def _hedged_attempt(self, fn, args, kwargs, give_up_at):
+        start = time.monotonic()
+
+        def run():
+            return fn(*args, timeout=max(0.1, give_up_at - time.monotonic()), **kwargs)
+
+        primary = self._pool.submit(run)
+        pending = {primary}
+        if self.hedge:
+            delay = min(self.hedge_delay(), max(0.0, give_up_at - start))
+            done, _ = wait(pending, timeout=delay)
+            if not done:
+                self.hedged += 1
+                pending.add(self._pool.submit(run))
+        error = None
+        while pending:
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        self.hedge_wins += 1
+                    self.latencies.append(time.monotonic() - start)
+                    return future.result()
+                error = future.exception()
+        if error is not None and not pending:
+            raise error
+        raise DeadlineExceeded(f"{self.name} did not respond within {self.deadline:.0f}s")
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "retries": self.retried,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "rejected": self.rejected,
+            "hedge_delay_s": self.hedge_delay(),
+            "circuit": self.breaker.state,
+        }
@@ -0,0 +1,56 @@
+import os
+import sys
+
+import pytest
+
+from app_catalog import AppCatalog
+
+
+def write_executable(directory, name):
+    path = directory / name
+    path.write_text("#!/bin/sh\n")
+    path.chmod(0o755)
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    # Stand-in Linux desktop: one applications folder and one PATH directory
+    monkeypatch.setattr(sys, "platform", "linux")
+    data_home, bin_dir = tmp_path / "share", tmp_path / "bin"
+    (data_home / "applications").mkdir(parents=True)
+    bin_dir.mkdir()
+    (data_home / "applications" / "org.gnome.Calculator.desktop").write_text(
+        "[Desktop Entry]\nName=Calculator\nExec=gnome-calculator\n")
+    (data_home / "applications" / "firefox.desktop").write_text(
+        "[Desktop Entry]\nName=Firefox Web Browser\nExec=firefox %u\n")
+    (data_home / "applications" / "session-logout.desktop").write_text(
+        "[Desktop Entry]\nName=Leave Session\nExec=systemctl poweroff\n")
+    for name in ("shutdown", "poweroff", "reboot", "halt", "file", "vlc"):
+        write_executable(bin_dir, name)
+    monkeypatch.setenv("XDG_DATA_HOME", str(data_home))
+    monkeypatch.setenv("XDG_DATA_DIRS", str(tmp_path / "missing"))
+    monkeypatch.setenv("PATH", str(bin_dir))
+    catalog = AppCatalog(path=str(tmp_path / "catalog.json"))
+    catalog.refresh()
+    return catalog
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses POSIX executable bits")
+@pytest.mark.parametrize("spoken", [
+    "shut down", "shutdown", "power off", "poweroff", "re boot", "reboot", "halt", "leave session",
+])
+def test_power_and_session_commands_never_resolve(catalog, spoken):
+    assert catalog.lookup(spoken) is None
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses POSIX executable bits")
+def test_path_executables_need_an_exact_name(catalog):
+    assert catalog.lookup("vlc")["target"][0].endswith("vlc")
+    assert catalog.lookup("files") is None
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses POSIX executable bits")
+def test_spoken_name_is_tried_before_its_alias(catalog):
+    assert catalog.lookup("calculator")["target"] == ["gnome-calculator"]
+    # No Chrome here, so the browser alias falls through to Firefox
+    assert catalog.lookup("browser")["target"] == ["firefox"]
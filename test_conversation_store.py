@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+from conversation_store import RESUME_TURNS, ConversationStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ConversationStore(path=str(tmp_path / "conversations.db"))
+    yield store
+    store.close()
+
+
+def seed(store, sessions, turns_per_session):
+    """Bulk-writes alternating user/model turns across many sessions, ending in a fresh one."""
+    with store._db:
+        for session in range(sessions):
+            session_id = store._db.execute("INSERT INTO sessions(started_at) VALUES (?)", (time.time(),)).lastrowid
+            store._db.executemany(
+                "INSERT INTO turns(session_id, ts, role, text) VALUES (?, ?, ?, ?)",
+                [(session_id, time.time(), "user" if i % 2 == 0 else "model", f"turn {i} of session {session}")
+                 for i in range(turns_per_session)])
+    store.session_id = session_id
+
+
+def median_resume_seconds(store, runs=50):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        store.recent_history()
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2]
+
+
+def test_recent_history_is_capped_and_opens_on_a_user_turn(store):
+    store.append("model", "a reply with no question before it")
+    for i in range(RESUME_TURNS):
+        store.append("user", f"question {i}")
+        store.append("model", f"answer {i}")
+    history = store.recent_history()
+    assert len(history) <= RESUME_TURNS
+    assert history[0]["role"] == "user"
+    assert history[-1] == {"role": "model", "parts": [f"answer {RESUME_TURNS - 1}"]}
+
+    # An odd limit would start on a model turn; that turn is dropped
+    history = store.recent_history(limit=3)
+    assert [turn["role"] for turn in history] == ["user", "model"]
+
+
+def test_start_session_hides_earlier_turns_from_resume(store):
+    store.append("user", "what is the weather in pune")
+    store.append("model", "It is 31 degrees in Pune.")
+    store.start_session()
+    assert store.recent_history() == []
+    store.append("user", "hello again")
+    assert store.recent_history() == [{"role": "user", "parts": ["hello again"]}]
+
+
+def test_reopening_resumes_the_latest_session(tmp_path):
+    path = str(tmp_path / "conversations.db")
+    first = ConversationStore(path=path)
+    first.append("user", "remember the milk")
+    first.append("model", "I will.")
+    first.close()
+    second = ConversationStore(path=path)
+    try:
+        assert [turn["parts"][0] for turn in second.recent_history()] == ["remember the milk", "I will."]
+    finally:
+        second.close()
+
+
+@pytest.mark.parametrize("use_fts", [True, False])
+def test_search_finds_turns_from_any_session(store, use_fts):
+    if use_fts and not store.has_fts:
+        pytest.skip("this SQLite build has no FTS5")
+    store.append("user", "book a table at the pizza place")
+    store.start_session()
+    store.append("user", "what about sushi tonight")
+    store.has_fts = use_fts
+    matches = store.search("pizza")
+    assert [text for _, _, text in matches] == ["book a table at the pizza place"]
+    assert matches[0][1] == "user"
+    assert store.search("ramen") == []
+
+
+def test_resume_time_does_not_grow_with_history(tmp_path):
+    small = ConversationStore(path=str(tmp_path / "small.db"))
+    large = ConversationStore(path=str(tmp_path / "large.db"))
+    try:
+        for store in (small, large):
+            seed(store, sessions=10 if store is small else 1000, turns_per_session=100)
+            # A short current session: without the index, filling the window scans every older turn
+            store.start_session()
+            store.append("user", "good morning")
+            store.append("model", "Good morning!")
+        assert len(large.recent_history()) == 2
+        # 100x the stored turns; an index-backed resume stays within noise of the small one
+        assert median_resume_seconds(large) < max(3 * median_resume_seconds(small), 0.002)
+    finally:
+        small.close()
+        large.close()
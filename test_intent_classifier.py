@@ -0,0 +1,54 @@
+import pytest
+
+from intent_classifier import EVALUATION_COMMANDS, IntentClassifier, load_tools
+
+MIN_ACCURACY = 0.9
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    # Same configuration luna.py deploys
+    return IntentClassifier(tools=load_tools())
+
+
+def test_routing_accuracy_on_labelled_commands(classifier):
+    results = classifier.evaluate(EVALUATION_COMMANDS)
+    assert results["accuracy"] >= MIN_ACCURACY
+
+
+@pytest.mark.parametrize("command, city", [
+    ("how hot is it in pune", "pune"),
+    # City names seen only in get_time examples must not pull weather requests there
+    ("what is the weather in new york", "new york"),
+])
+def test_routes_plain_tool_request_with_arguments(classifier, command, city):
+    tool_name, args, score = classifier.classify(command)
+    assert tool_name == "get_temperature"
+    assert args == {"city": city}
+    assert score >= classifier.threshold
+
+
+@pytest.mark.parametrize("command", [
+    "what is the temperature of boiling water",
+    "how much memory does a python int use",
+    "start the car",
+    # Arguments that are not names
+    "how cold is it in the fridge",
+    "how warm is it in here",
+    "what is the temperature in kelvin of absolute zero",
+    "launch a rocket",
+])
+def test_non_tool_requests_stay_with_gemini(classifier, command):
+    assert classifier.classify(command) is None
+
+
+# classify() is the path luna.py runs: fixed command phrases first, then the classifier
+@pytest.mark.parametrize("command, tool_name, args", [
+    ("search for flights to london", "search_web", {"query": "flights to london"}),
+    ("time in tokyo please", "get_time", {"city": "tokyo"}),
+    ("open up spotify app", "open_application", {"app_name": "spotify"}),
+    ("open d:", "open_folder_or_drive", {"path": "d:"}),
+    ("move file notes.txt to archive", "move_file", {"filename": "notes.txt", "destination_folder": "archive"}),
+])
+def test_fixed_command_phrases(classifier, command, tool_name, args):
+    assert classifier.classify(command) == (tool_name, args, 1.0)
@@ -0,0 +1,140 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from resilience import ResilientCaller, CircuitBreaker, CircuitOpenError, DeadlineExceeded
+
+# Local stand-in for an upstream service. The path picks the failure mode, and
+# a per-path request counter keeps the injected faults deterministic:
+#   /ok     answers immediately
+#   /slow   50 ms, except every 10th request stalls for 1 s
+#   /flaky  every other request returns 503
+#   /down   always returns 503
+#   /hang   takes 2 s to answer
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    counts = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            count = self.counts[self.path] = self.counts.get(self.path, 0) + 1
+        if self.path == "/slow":
+            time.sleep(1.0 if count % 10 == 0 else 0.05)
+        elif self.path == "/hang":
+            time.sleep(2.0)
+        if self.path == "/down" or (self.path == "/flaky" and count % 2 == 0):
+            self.send_response(503)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b'{"cod": 200}')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def is_retryable(exc):
+    if isinstance(exc, urllib.error.HTTPError):
+        return exc.code >= 500 or exc.code == 429
+    return isinstance(exc, (urllib.error.URLError, OSError))
+
+
+def fetcher(url):
+    def fetch(timeout):
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.read()
+    return fetch
+
+
+def run(caller, url, n):
+    """Calls url n times; returns (sorted latencies, successes)."""
+    latencies, successes = [], 0
+    for _ in range(n):
+        start = time.perf_counter()
+        try:
+            caller.call(fetcher(url))
+            successes += 1
+        except (CircuitOpenError, DeadlineExceeded, urllib.error.URLError, OSError):
+            pass
+        latencies.append(time.perf_counter() - start)
+    return sorted(latencies), successes
+
+
+def p99(latencies):
+    return latencies[int(len(latencies) * 0.99) - 1]
+
+
+def test_hedging_cuts_tail_latency(base_url):
+    def caller(hedge):
+        return ResilientCaller("slow", deadline=5.0, retries=0, hedge=hedge,
+                               min_hedge_delay=0.1, default_hedge_delay=0.2, is_retryable=is_retryable)
+    unhedged, _ = run(caller(False), base_url + "/slow", 40)
+    hedged_caller = caller(True)
+    hedged, successes = run(hedged_caller, base_url + "/slow", 40)
+    assert successes == 40
+    assert hedged_caller.hedge_wins > 0
+    assert p99(hedged) < p99(unhedged)
+
+
+def test_retries_raise_success_rate(base_url):
+    def caller(retries):
+        return ResilientCaller("flaky", deadline=5.0, retries=retries, backoff=0.01, hedge=False,
+                               is_retryable=is_retryable, breaker=CircuitBreaker(failure_threshold=1000))
+    _, without_retries = run(caller(0), base_url + "/flaky", 20)
+    _, with_retries = run(caller(3), base_url + "/flaky", 20)
+    assert with_retries > without_retries
+
+
+def test_open_breaker_rejects_fast(base_url):
+    caller = ResilientCaller("down", deadline=2.0, retries=0, hedge=False, is_retryable=is_retryable,
+                             breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60))
+    for _ in range(3):
+        with pytest.raises(urllib.error.HTTPError):
+            caller.call(fetcher(base_url + "/down"))
+    assert caller.breaker.state == "open"
+    requests_seen = StandInHandler.counts["/down"]
+    start = time.perf_counter()
+    with pytest.raises(CircuitOpenError):
+        caller.call(fetcher(base_url + "/down"))
+    # Rejected without a request; the time bound only guards against a slow fallback path
+    assert StandInHandler.counts["/down"] == requests_seen
+    assert time.perf_counter() - start < 0.05
+
+
+def test_half_open_trial_closes_breaker(base_url):
+    caller = ResilientCaller("recovering", deadline=2.0, retries=0, hedge=False, is_retryable=is_retryable,
+                             breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.2))
+    with pytest.raises(urllib.error.HTTPError):
+        caller.call(fetcher(base_url + "/down"))
+    assert caller.breaker.state == "open"
+    time.sleep(0.25)
+    assert caller.breaker.state == "half-open"
+    caller.call(fetcher(base_url + "/ok"))
+    assert caller.breaker.state == "closed"
+
+
+def test_deadline_exceeded(base_url):
+    # The client ignores the per-call timeout, like an SDK call that hangs
+    def fetch_without_timeout(timeout):
+        return fetcher(base_url + "/hang")(5.0)
+
+    caller = ResilientCaller("hang", deadline=0.3, retries=0, hedge=False, is_retryable=is_retryable)
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        caller.call(fetch_without_timeout)
+    assert time.perf_counter() - start < 1.0
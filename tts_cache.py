@@ -0,0 +1,189 @@
+# tts_cache.py
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+from collections import OrderedDict
+
+try:
+    import winsound
+except Exception:
+    winsound = None
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".luna", "tts_cache")
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+MAX_TRACKED_REPLIES = 2000
+
+# Fixed phrases Luna says on almost every interaction. These are always cached;
+# any other reply is cached once it has been spoken a few times.
+STABLE_PHRASES = (
+    "Yes? How can I help?",
+    "Listening...",
+    "Opening in your browser.",
+    "Searching the web.",
+    "Sorry, I did not understand that.",
+    "Sorry, my speech service is down.",
+    "Sorry, I ran into a little trouble with that request.",
+    "Chat history cleared.",
+    "Goodbye!",
+)
+
+
+def play_audio(path):
+    """Plays a rendered audio file. Returns False if no player is available."""
+    if winsound is not None:
+        winsound.PlaySound(path, winsound.SND_FILENAME)
+        return True
+    for player in (["afplay"], ["paplay"], ["aplay", "-q"]):
+        if shutil.which(player[0]):
+            return subprocess.run(player + [path]).returncode == 0
+    return False
+
+
+def audio_player_available():
+    """Checks whether play_audio has something to play files with."""
+    return winsound is not None or any(shutil.which(p) for p in ("afplay", "paplay", "aplay"))
+
+
+class TTSCache:
+    """Disk cache of pre-rendered speech, keyed on text, voice and rate and evicted LRU."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, min_repeats=2, max_chars=160):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.min_repeats = min_repeats
+        self.max_chars = max_chars
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.enabled = audio_player_available()
+        self.entries = OrderedDict()  # key -> {"file", "size", "render_s"}, least recently used first
+        self.seen = OrderedDict()  # text -> times spoken, capped at MAX_TRACKED_REPLIES
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    # --- Index persistence ---
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return
+        for key, entry in data.get("entries", []):
+            if os.path.exists(os.path.join(self.cache_dir, entry["file"])):
+                self.entries[key] = entry
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": list(self.entries.items())}, f)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            print(f"Warning: Could not save TTS cache index. Error: {e}")
+
+    # --- Lookup and rendering ---
+
+    @staticmethod
+    def _key(text, voice, rate):
+        return hashlib.sha1(f"{voice}|{rate}|{text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _engine_voice(engine):
+        try:
+            return engine.getProperty('voice'), engine.getProperty('rate')
+        except Exception:
+            return None, None
+
+    def should_cache(self, text):
+        """Stable phrases are always cached; other short replies once they repeat."""
+        if not self.enabled or len(text) > self.max_chars:
+            return False
+        if text in STABLE_PHRASES:
+            return True
+        count = self.seen.pop(text, 0) + 1
+        self.seen[text] = count
+        if len(self.seen) > MAX_TRACKED_REPLIES:
+            self.seen.popitem(last=False)
+        return count >= self.min_repeats
+
+    def _render(self, engine, text, key):
+        """Synthesizes text to a wav file and records how long that took."""
+        filename = f"{key}.wav"
+        path = os.path.join(self.cache_dir, filename)
+        start = time.perf_counter()
+        engine.save_to_file(text, path)
+        engine.runAndWait()
+        render_s = time.perf_counter() - start
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return None
+        self.entries[key] = {"file": filename, "size": os.path.getsize(path), "render_s": render_s}
+        self._evict()
+        self._save_index()
+        return path
+
+    def _evict(self):
+        total = sum(entry["size"] for entry in self.entries.values())
+        while total > self.max_bytes and len(self.entries) > 1:
+            _, entry = self.entries.popitem(last=False)
+            total -= entry["size"]
+            try:
+                os.remove(os.path.join(self.cache_dir, entry["file"]))
+            except OSError:
+                pass
+
+    def speak(self, engine, text):
+        """Plays text from the cache, rendering it first on a miss. Returns True if spoken."""
+        if not self.should_cache(text):
+            return False
+        voice, rate = self._engine_voice(engine)
+        key = self._key(text, voice, rate)
+        entry = self.entries.get(key)
+        if entry is not None:
+            path = os.path.join(self.cache_dir, entry["file"])
+            if os.path.exists(path):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += entry["render_s"]
+                return play_audio(path)
+            del self.entries[key]
+        self.misses += 1
+        path = self._render(engine, text, key)
+        return path is not None and play_audio(path)
+
+    def prerender(self, engine, phrases=STABLE_PHRASES):
+        """Renders phrases ahead of time so their first use is already a hit."""
+        if not self.enabled:
+            return
+        voice, rate = self._engine_voice(engine)
+        for text in phrases:
+            key = self._key(text, voice, rate)
+            if key not in self.entries:
+                self._render(engine, text, key)
+
+    # --- Reporting ---
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "entries": len(self.entries),
+            "bytes": sum(entry["size"] for entry in self.entries.values()),
+        }
+
+    def report(self):
+        return format_cache_stats(self.stats())
+
+
+def format_cache_stats(s):
+    """Formats TTSCache.stats() output for speaking or printing."""
+    return (f"Speech cache: {s['hits']} hits, {s['misses']} misses ({s['hit_rate']:.0%} hit rate), "
+            f"{s['saved_seconds']:.1f}s of synthesis saved, {s['entries']} phrases "
+            f"({s['bytes'] / (1024 ** 2):.1f} MB).")
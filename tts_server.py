@@ -0,0 +1,251 @@
+# tts_server.py
+# Runs pyttsx3 in a long-lived child process so a stuck or crashed engine never
+# stalls the assistant. The parent talks to it over stdin/stdout, one JSON
+# message per line.
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+from tts_cache import TTSCache, format_cache_stats
+
+SPEAK_TIMEOUT_BASE = 5.0      # seconds a short phrase may take once the child starts on it
+SPEAK_TIMEOUT_PER_CHAR = 0.1  # extra seconds allowed per character of text
+READY_TIMEOUT = 30.0          # engine init plus pre-rendering the stable phrases
+RESTART_BACKOFF = 1.0
+
+
+# --- CHILD PROCESS ---
+
+def _init_engine(rate, volume):
+    import pyttsx3
+    try:
+        engine = pyttsx3.init('sapi5')
+    except Exception:
+        engine = pyttsx3.init()
+    try:
+        engine.setProperty('rate', rate)
+        engine.setProperty('volume', volume)
+    except Exception:
+        pass
+    return engine
+
+
+def serve(rate=180, volume=1.0):
+    """Child entry point: speaks each request read from stdin and acknowledges it."""
+    # Keep stdout for the protocol; anything pyttsx3 prints goes to stderr
+    channel = sys.stdout
+    sys.stdout = sys.stderr
+
+    def send(message):
+        channel.write(json.dumps(message) + "\n")
+        channel.flush()
+
+    start = time.perf_counter()
+    engine = _init_engine(rate, volume)
+    cache = TTSCache()
+    # Render the stable phrases before reporting ready so their first use is a cache hit.
+    # Only phrases missing from the on-disk cache are rendered, so this is quick after the first run.
+    try:
+        cache.prerender(engine)
+    except Exception:
+        pass
+    send({"op": "ready", "pid": os.getpid(), "init_s": time.perf_counter() - start})
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        try:
+            if not cache.speak(engine, request["text"]):
+                engine.say(request["text"])
+                engine.runAndWait()
+        except Exception as e:
+            # Let the parent restart us with a fresh engine
+            send({"op": "error", "id": request["id"], "error": str(e)})
+            sys.exit(1)
+        send({"op": "done", "id": request["id"], "cache": cache.stats()})
+
+
+# --- PARENT SIDE ---
+
+class TTSClient:
+    """Queues speech for the TTS child process and restarts it in the background when it dies."""
+
+    def __init__(self, rate=180, volume=1.0, log=print):
+        self.rate = rate
+        self.volume = volume
+        self.log = log
+        self._requests = queue.Queue()
+        self._done = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._proc = None
+        self._thread = None
+        self._replies = None
+        self._retry = None
+        self._closed = False
+        self._failed_at = None   # set once a child has died or failed to start
+        self.restarts = 0
+        self.recovery_times = []
+        self.cache_stats = {}
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def say(self, text, wait=True):
+        """
+        Queues text to be spoken and waits for it to finish. At startup this includes
+        waiting (up to READY_TIMEOUT) for the first child; during a restart it returns at once.
+        """
+        self.start()
+        with self._lock:
+            self._next_id += 1
+            request_id = self._next_id
+            done = self._done[request_id] = threading.Event()
+        self._requests.put({"id": request_id, "text": str(text)})
+        # Never block on engine recovery: queued speech plays once the child is back.
+        # Hangs are detected by the supervisor, which times each phrase from when it is sent.
+        if wait:
+            if self._failed_at is None:
+                self._ready.wait(READY_TIMEOUT)
+            while self._ready.is_set() and not done.wait(0.1):
+                pass
+        with self._lock:
+            self._done.pop(request_id, None)
+
+    @staticmethod
+    def _speak_timeout(text):
+        return SPEAK_TIMEOUT_BASE + SPEAK_TIMEOUT_PER_CHAR * len(text)
+
+    def _spawn(self):
+        """Starts a child and waits up to READY_TIMEOUT for it to report ready."""
+        args = [sys.executable, os.path.abspath(__file__), str(self.rate), str(self.volume)]
+        proc = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                text=True, encoding="utf-8", bufsize=1)
+        replies = queue.Queue()
+        threading.Thread(target=self._read_replies, args=(proc, replies), daemon=True).start()
+        try:
+            ready = replies.get(timeout=READY_TIMEOUT)
+        except queue.Empty:
+            ready = None
+        if not ready or json.loads(ready).get("op") != "ready":
+            proc.kill()
+            return None
+        self._replies = replies
+        return proc
+
+    @staticmethod
+    def _read_replies(proc, replies):
+        """Forwards the child's reply lines so the supervisor can wait on them with a timeout."""
+        for line in proc.stdout:
+            replies.put(line)
+        replies.put(None)
+
+    def _run(self):
+        """Supervisor loop: keeps a child alive and feeds it queued requests one at a time."""
+        while not self._closed:
+            try:
+                self._proc = self._spawn()
+            except Exception as e:
+                self.log(f"--- TTS server failed to start: {e} ---")
+                self._proc = None
+            if self._proc is None:
+                # From here on say() stops waiting for the engine
+                if self._failed_at is None:
+                    self._failed_at = time.perf_counter()
+                time.sleep(RESTART_BACKOFF)
+                continue
+            if self._failed_at is not None:
+                self.recovery_times.append(time.perf_counter() - self._failed_at)
+                self.restarts += 1
+            self._ready.set()
+            self._serve_child()
+            self._failed_at = time.perf_counter()
+            self._ready.clear()
+            if self._closed:
+                break
+            self.log("--- TTS server stopped. Restarting in the background. ---")
+
+    def _next_request(self):
+        if self._retry is not None:
+            request, self._retry = self._retry, None
+            return request
+        return self._requests.get()
+
+    def _serve_child(self):
+        proc = self._proc
+        while not self._closed:
+            request = self._next_request()
+            if request is None:
+                break
+            try:
+                proc.stdin.write(json.dumps({"id": request["id"], "text": request["text"]}) + "\n")
+                proc.stdin.flush()
+                line = self._replies.get(timeout=self._speak_timeout(request["text"]))
+                reply = json.loads(line or "{}")
+            except queue.Empty:
+                reply = {"error": "speech engine hung"}
+            except (OSError, ValueError):
+                reply = {}
+            if reply.get("op") == "done":
+                self._finish(request["id"])
+                self.cache_stats = reply.get("cache", {})
+                continue
+            if reply.get("error"):
+                self.log(f"--- TTS Error: {reply['error']} ---")
+            # Give the phrase that hit the failure one more try on the fresh child
+            if not request.get("retried"):
+                self._retry = dict(request, retried=True)
+            else:
+                self._finish(request["id"])
+            break
+        self._kill_child()
+
+    def _kill_child(self):
+        proc = self._proc
+        if proc is not None:
+            try:
+                proc.kill()
+            except Exception:
+                pass
+
+    def _finish(self, request_id):
+        with self._lock:
+            done = self._done.get(request_id)
+        if done is not None:
+            done.set()
+
+    def stats(self):
+        recoveries = self.recovery_times
+        return {
+            "alive": self._ready.is_set(),
+            "queued": self._requests.qsize(),
+            "restarts": self.restarts,
+            "last_recovery_s": recoveries[-1] if recoveries else None,
+            "avg_recovery_s": sum(recoveries) / len(recoveries) if recoveries else None,
+            "cache": self.cache_stats,
+        }
+
+    def report(self):
+        s = self.stats()
+        recovery = "no restarts" if not s["restarts"] else (
+            f"{s['restarts']} restarts, last recovery {s['last_recovery_s']:.1f}s, "
+            f"average {s['avg_recovery_s']:.1f}s")
+        cache = format_cache_stats(s["cache"]) if s["cache"] else "Speech cache: no lookups yet."
+        return f"Speech server: {recovery}. {cache}"
+
+    def close(self):
+        self._closed = True
+        self._requests.put(None)
+        self._kill_child()
+
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]) if len(sys.argv) > 1 else 180,
+          float(sys.argv[2]) if len(sys.argv) > 2 else 1.0)